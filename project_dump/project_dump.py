@@ -4,8 +4,53 @@ import os
 import argparse
 import sys
 import re
+import queue
+import threading
+import io
+import errno
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Set, Tuple, Optional, Pattern
+from typing import List, Set, Tuple, Optional, Pattern, FrozenSet, Iterable, NamedTuple
+
+try:
+    # Optional: gitignore matching as used by black, ruff and others, with full
+    # support for negated patterns. The built-in translation is used without it.
+    import pathspec
+except ImportError:
+    pathspec = None
+
+# Default buffer size used for writing the output file; a large buffer keeps the
+# number of write calls low when dumping big trees.
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Chunk size for copying file contents into the output file.
+COPY_CHUNK_SIZE = 1 << 20
+
+# Static parts of the per-file headings, encoded once for the output file.
+HEADING_PREFIX = b"\n\n### "
+HEADING_SUFFIX = b"\n\n"
+
+# Fence around every file body, so headings or ``` blocks inside dumped files
+# (e.g. Markdown) stay part of the body. A line of four backticks inside a file
+# still closes the fence early. The closing fence gets a newline in front of it
+# only if the body does not end with one.
+BODY_START = b"````\n"
+BODY_END = b"````\n"
+
+# Files below this size are read in one go instead of being copied in chunks.
+SMALL_FILE_SIZE = 1 << 16
+
+# os.sendfile can only write to regular files on Linux.
+USE_SENDFILE = sys.platform.startswith('linux') and hasattr(os, 'sendfile')
+
+# Source files are copied byte for byte, O_BINARY prevents newline translation on Windows.
+READ_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+
+# Flags for all ignore and exclude patterns. Paths are mostly ASCII, and '.' has
+# to match every character, even in odd file names containing newlines.
+PATTERN_FLAGS = re.ASCII | re.DOTALL
 
 # --- Pre-configured Recipes for Different Project Types ---
 
@@ -24,32 +69,40 @@ RECIPES = {
 
 # --- Core Logic for Parsing .gitignore ---
 
-def parse_gitignore(gitignore_path: Path) -> List[Pattern]:
+def parse_gitignore(gitignore_path: Path) -> List[str]:
     """
-    Reads a .gitignore file and returns a list of compiled regex patterns.
+    Reads a .gitignore file and returns its patterns.
     """
     if not gitignore_path.is_file():
         return []
 
     patterns = []
-    with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as f:
-        for line in f:
-            # ignore empty lines or comments
-            if not line or line.startswith('#'): 
-                continue
-            pattern = _translate_to_re_pattern(line.strip())
-            if pattern:
-                patterns.append(pattern)
+    lines = gitignore_path.read_text(encoding='utf-8', errors='ignore').splitlines()
+    for line in lines:
+        line = line.strip()
+        # ignore empty lines or comments
+        if not line or line.startswith('#'):
+            continue
+        patterns.append(line)
     return patterns
 
 # --- Core Logic for converting ignore and exclude items ---
 
-def _translate_to_re_pattern(pattern: str) -> Optional[Pattern]:
+@lru_cache(maxsize=1024)
+def _translate_to_re_source(pattern: str) -> Optional[str]:
     """
-    Translates a single gitignore pattern into a compiled regex object.
+    Translates a single gitignore pattern into the source of a regex.
 
     Handles basic gitignore syntax like wildcards (*, **), directory matching,
     and anchoring. Does not support negated patterns (!).
+
+    The regex has to be matched with `fullmatch` against a relative path. It only
+    matches the path itself, not its children: the traversal tests every
+    directory on the way down, so anything below a matching directory is
+    handled there.
+
+    Results are cached, so a pattern that shows up in several recipes, on the
+    command line and in the .gitignore is only translated once.
     """
     if pattern.startswith('!'):
         print(f"Warning: projectdump currently does not support negated patterns (!)")
@@ -57,86 +110,306 @@ def _translate_to_re_pattern(pattern: str) -> Optional[Pattern]:
 
     regex_parts = []
     # If pattern starts with slash it has to match with root directory. Otherwise the pattern can match
-    # anywhere in the file string.
-    if pattern.startswith('/'):
-        regex_parts.append(r'^')
-    else:
-        regex_parts.append(r'(?:^|\/)')
+    # below any directory.
+    if not pattern.startswith('/'):
+        regex_parts.append(r'(?:.*/)?')
     pattern = pattern.strip('/')
 
     # Translate glob-like syntax to regex syntax
-    for char in pattern:
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
         if char == '*':
-            # Handle '**' (matches any character, including slashes)
-            if regex_parts and regex_parts[-1] == r'[^/]*':
-                regex_parts[-1] = r'.*'
+            # Consume the whole run of asterisks, so '**' is handled as one token
+            end = i
+            while end < len(pattern) and pattern[end] == '*':
+                end += 1
+            is_globstar = end - i == 2 and (i == 0 or pattern[i - 1] == '/')
+            if is_globstar and pattern.startswith('/', end):
+                # Handle '**/' (matches zero or more directories)
+                regex_parts.append(r'(?:.*/)?')
+                end += 1
+            elif is_globstar and end == len(pattern):
+                # Handle trailing '**' (matches everything inside)
+                regex_parts.append(r'.*')
             else:
-                # Handle '*' (matches any character except slashes)
+                # Handle '*' (matches any character except slashes), other runs of
+                # asterisks are regular asterisks
                 regex_parts.append(r'[^/]*')
+            i = end
+            continue
         elif char == '?':
             regex_parts.append(r'[^/]')  # '?' matches any single character except a slash
         else:
             regex_parts.append(re.escape(char))
+        i += 1
     
-    # Anchor the regex to match the full file or directory name.
-    regex_parts.append(r'(/.*)?$')
-    try:
-        return re.compile("".join(regex_parts))
-    except re.error as e:
-        print(f"Warning: Could not compile gitignore pattern '{pattern}'. Error: {e}", file=sys.stderr)
-        return None
+    return "".join(regex_parts)
+
+class PatternMatcher(NamedTuple):
+    """
+    A set of ignore or exclude patterns, split by how cheaply they can be checked.
+
+    Most patterns are plain names like '__pycache__' or extensions like '*.pyc';
+    these are checked with a set lookup on the entry name. The remaining patterns
+    are combined into a single regex, patterns containing a slash are handled by
+    a pathspec GitIgnoreSpec instead if pathspec is installed.
+    """
+    names: FrozenSet[str]
+    extensions: FrozenSet[str]
+    regex: Optional[Pattern]
+    spec: Optional['pathspec.GitIgnoreSpec'] = None
+
+    def matches(self, relative_path: str, name: str) -> bool:
+        """
+        Checks if an entry, given by its relative path and name, matches any pattern.
+        """
+        if name in self.names:
+            return True
+        if self.extensions:
+            _, dot, extension = name.rpartition('.')
+            if dot and extension in self.extensions:
+                return True
+        if self.regex is not None and self.regex.fullmatch(relative_path) is not None:
+            return True
+        return self.spec is not None and self.spec.match_file(relative_path)
+
+# plain names and '*.ext' patterns, which match the last component of a path only
+_NAME_PATTERN = re.compile(r'[\w.\-]+')
+_EXTENSION_PATTERN = re.compile(r'\*\.(\w+)')
+
+def _build_matcher(items: Iterable[str]) -> PatternMatcher:
+    """
+    Sorts ignore or exclude items into names, extensions and the remaining patterns.
+
+    The remaining patterns are translated and compiled in one step into a single
+    alternation, so each path needs one regex match instead of one per pattern.
+
+    If pathspec is installed, patterns with a trailing or inner slash (and all
+    patterns, if any is negated) go into a GitIgnoreSpec and follow gitignore
+    semantics: 'logs/' only matches directories and 'a/*' is anchored at the
+    root. Without pathspec both are matched like the plain pattern, at any
+    depth. The spec is slower than the regex, so it gets no other patterns.
+    """
+    items = list(items)
+    if pathspec is not None and any(item.startswith('!') for item in items):
+        # negated patterns depend on the order of all patterns before them,
+        # so they cannot be split into buckets
+        return PatternMatcher(frozenset(), frozenset(), None, pathspec.GitIgnoreSpec.from_lines(items))
+
+    names = set()
+    extensions = set()
+    remaining = []
+    spec_items = []
+    for item in items:
+        if pathspec is not None and '/' in item.lstrip('/'):
+            spec_items.append(item)
+            continue
+        # without pathspec a trailing slash makes no difference, see _translate_to_re_source
+        unanchored = item if item.startswith('/') else item.rstrip('/')
+        if _NAME_PATTERN.fullmatch(unanchored):
+            names.add(unanchored)
+            continue
+        extension_match = _EXTENSION_PATTERN.fullmatch(unanchored)
+        if extension_match:
+            extensions.add(extension_match.group(1))
+            continue
+        remaining.append(item)
+
+    spec = pathspec.GitIgnoreSpec.from_lines(spec_items) if spec_items else None
+    regex = None
+    sources = {_translate_to_re_source(item) for item in remaining}
+    sources.discard(None)
+    if sources:
+        try:
+            regex = re.compile("|".join(f"(?:{source})" for source in sorted(sources)), PATTERN_FLAGS)
+        except re.error as e:
+            print(f"Warning: Could not compile patterns. Error: {e}", file=sys.stderr)
+    return PatternMatcher(frozenset(names), frozenset(extensions), regex, spec)
 
 
 # --- Core Logic for Discovering and Filtering Files ---
 
+def _scan_directory(
+    current_path: str,
+    relative_dir: str,
+    file_endings: Set[str],
+    ignore_matcher: PatternMatcher,
+    exclude_content_matcher: PatternMatcher,
+    content_excluded: bool = False,
+) -> Tuple[List[Tuple[str, str, bool]], List[Tuple[Path, os.stat_result]], List[Path]]:
+    """
+    Scans a single directory and filters its entries.
+
+    Relative paths are handled as plain '/'-separated strings; a Path is only
+    created for files that end up in one of the result lists.
+
+    A pattern matching a directory also matches everything below it, so the
+    exclude patterns are checked once per directory: if `content_excluded` is
+    set, the directory or one of its parents matched, and the content of all
+    files in it is excluded without searching their paths.
+
+    Returns:
+        A tuple containing the subdirectories to descend into (as triples of
+        absolute path, relative path and whether their content is excluded),
+        the paths and stat results of the files whose content should be included
+        and the paths whose content should be excluded.
+    """
+    sub_dirs = []
+    included_files = []
+    excluded_content_paths = []
+
+    try:
+        with os.scandir(current_path) as it:
+            entries = list(it)
+    except OSError:
+        # unreadable directories are skipped, like os.walk does
+        return sub_dirs, included_files, excluded_content_paths
+
+    prefix = relative_dir + '/' if relative_dir else ''
+    for entry in entries:
+        relative_item_path = prefix + entry.name
+
+        # 1. Check against ignored patterns. This happens before the entry type
+        #    is looked at, so ignored entries never cost a stat call and ignored
+        #    directories are pruned before descending into them.
+        if ignore_matcher.matches(relative_item_path, entry.name):
+            continue
+
+        # the type comes from the directory listing; only symlinks need a stat
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            is_file = not is_dir and entry.is_file()
+        except OSError:
+            # broken or looping symlinks are skipped, like unreadable directories
+            continue
+        if is_dir:
+            sub_dirs.append((
+                entry.path,
+                relative_item_path,
+                content_excluded
+                or exclude_content_matcher.matches(relative_item_path, entry.name),
+            ))
+            continue
+        if not is_file:
+            continue
+
+        # 2. Files in an excluded directory or without a valid file ending only
+        #    show up in the tree, so these cheap checks come before the exclude patterns
+        if content_excluded or os.path.splitext(entry.name)[1] not in file_endings:
+            excluded_content_paths.append(Path(relative_item_path))
+            continue
+        
+        # 3. Check if the file content should be excluded
+        if exclude_content_matcher.matches(relative_item_path, entry.name):
+            excluded_content_paths.append(Path(relative_item_path))
+            continue
+
+        # 4. Add all other files with their content. The stat result is kept for
+        #    the dump, which needs the file size; DirEntry caches it, and on
+        #    Windows it even comes with the directory listing for free.
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            # the file vanished or cannot be accessed, show it in the tree only
+            excluded_content_paths.append(Path(relative_item_path))
+            continue
+        included_files.append((Path(relative_item_path), stat_result))
+
+    return sub_dirs, included_files, excluded_content_paths
+
+
 def discover_files(
     root_dir: Path,
     file_endings: Set[str],
-    ignore_patterns: Set[Pattern],
-    exclude_content_patterns: Set[Pattern],
-) -> Tuple[List[Path], List[Path]]:
+    ignore_matcher: PatternMatcher,
+    exclude_content_matcher: PatternMatcher,
+    workers: int = 1,
+) -> Tuple[List[Tuple[Path, os.stat_result]], List[Path]]:
     """
     Walks a directory and collects all files that meet the criteria.
 
     This function performs the first pass, discovering and filtering files
-    without reading their content, which is more memory-efficient.
+    without reading their content, which is more memory-efficient. With more
+    than one worker, several directories are scanned concurrently, which pays
+    off on network mounts where every directory listing waits on a round trip.
 
     Returns:
-        A tuple containing two lists of paths:
-        1. Paths whose content should be included.
+        A tuple containing two unsorted lists:
+        1. Paths and stat results of the files whose content should be included.
         2. Paths whose content should be excluded (but are shown in the tree).
     """
-    included_paths = []
+    included_files = []
     excluded_content_paths = []
 
-    for current_path, dirs, files in os.walk(root_dir):
-        current_relative_path = Path(current_path).relative_to(root_dir)
-
-        # continue on path that match with ignored patterns
-        if any(p.search(str(current_relative_path)) for p in ignore_patterns):
-            continue
-        
-        for item_name in files:
-            relative_item_path = current_relative_path / item_name
-
-            # 1. Check against ignored patterns
-            if any(p.search(str(relative_item_path)) for p in ignore_patterns):
-                continue
-            
-            # 2. Check if the file content should be excluded
-            if any([p.search(str(relative_item_path)) for p in exclude_content_patterns]):
-                excluded_content_paths.append(relative_item_path)
-                continue
-
-            # 3. Check for valid file endings
-            if relative_item_path.suffix in file_endings:
-                included_paths.append(relative_item_path)
-                continue
-            
-            # 4. Add all other files to tree
-            excluded_content_paths.append(relative_item_path)
+    # os.scandir yields DirEntry objects whose type information comes straight
+    # from the directory listing, so no extra stat call is needed per entry.
+    def scan(
+        current_path: str, relative_dir: str, content_excluded: bool
+    ) -> List[Tuple[str, str, bool]]:
+        """Scans one directory, records its files and returns its subdirectories."""
+        sub_dirs, included, excluded = _scan_directory(
+            current_path,
+            relative_dir,
+            file_endings,
+            ignore_matcher,
+            exclude_content_matcher,
+            content_excluded,
+        )
+        # list.extend is atomic under the GIL, so workers can share the result lists
+        included_files.extend(included)
+        excluded_content_paths.extend(excluded)
+        return sub_dirs
+
+    if workers <= 1:
+        pending_dirs = deque([(str(root_dir), '', False)])
+        while pending_dirs:
+            pending_dirs.extend(scan(*pending_dirs.pop()))
+        return included_files, excluded_content_paths
+
+    # The queue counts unfinished directories itself: every put() increments the
+    # counter and every task_done() decrements it, so join() returns once the
+    # whole tree has been scanned.
+    pending_queue = queue.Queue()
+    # the first unexpected error from a worker
+    errors = []
+    # set after an error or when the main thread is interrupted (e.g. Ctrl-C);
+    # the workers then only drain the queue, otherwise join() would wait for
+    # directories nobody scans
+    stop_scanning = threading.Event()
+
+    def worker():
+        while True:
+            pending_dir = pending_queue.get()
+            if pending_dir is None:
+                return
+            try:
+                if not stop_scanning.is_set():
+                    for sub_dir in scan(*pending_dir):
+                        pending_queue.put(sub_dir)
+            except Exception as e:
+                errors.append(e)
+                stop_scanning.set()
+            finally:
+                pending_queue.task_done()
+
+    pending_queue.put((str(root_dir), '', False))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(workers):
+            executor.submit(worker)
+        try:
+            pending_queue.join()
+        finally:
+            # the executor waits for all workers on exit, so they have to be
+            # stopped even if join() was interrupted
+            stop_scanning.set()
+            for _ in range(workers):
+                pending_queue.put(None)
+    if errors:
+        # re-raise unexpected errors from the worker threads
+        raise errors[0]
 
-    return sorted(included_paths), sorted(excluded_content_paths)
+    return included_files, excluded_content_paths
 
 
 # --- Output Generation ---
@@ -144,14 +417,10 @@ def discover_files(
 def create_tree(root_dir: Path, all_paths: List[Path]) -> str:
     """
     Generates a string representation of the directory tree from a list of paths.
-    """
-    tree_str = f"{root_dir.name}\n"
-    
-    # Create a set of all parent directories for quick lookup
-    parents = set()
-    for p in all_paths:
-        parents.update(p.parents)
 
+    The paths have to be sorted. Dictionaries keep their insertion order, so the
+    children of every node are then already in order and need no sorting.
+    """
     # Use a dictionary to hold the structure
     tree_dict = {}
     for path in all_paths:
@@ -161,53 +430,181 @@ def create_tree(root_dir: Path, all_paths: List[Path]) -> str:
                 current_level[part] = {}
             current_level = current_level[part]
 
-    def build_tree_string(subtree: dict, prefix: str = "") -> str:
-        """Helper to recursively build the tree string."""
-        entries = sorted(subtree.keys())
-        output = ""
+    def build_tree_string(subtree: dict, prefix: str, out: List[str]) -> None:
+        """Helper to recursively append the lines of the tree string to `out`."""
+        entries = list(subtree)
         for i, key in enumerate(entries):
             is_last = i == (len(entries) - 1)
             connector = "└── " if is_last else "├── "
-            output += f"{prefix}{connector}{key}\n"
+            out.append(f"{prefix}{connector}{key}\n")
             
             if subtree[key]:
                 new_prefix = prefix + ("    " if is_last else "│   ")
-                output += build_tree_string(subtree[key], new_prefix)
-        return output
+                build_tree_string(subtree[key], new_prefix, out)
 
-    return tree_str + build_tree_string(tree_dict)
+    # collect all lines first and join them once, instead of growing a string
+    lines = [f"{root_dir.name}\n"]
+    build_tree_string(tree_dict, "", lines)
+    return "".join(lines)
 
-def create_file_content_dump(root_dir: Path, rel_paths: List[Path]) -> str:
+class SourceReadError(Exception):
+    """
+    Raised when a source file cannot be read while it is copied to the output.
+    Errors writing the output file are raised as they are.
+    """
+
+# sendfile errors meaning the files involved do not support it, not that the copy failed
+_SENDFILE_UNSUPPORTED = {errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+def _dump_file_raw(out: io.BufferedWriter, src_fd: int, size: int, chunk: memoryview) -> bytes:
+    """
+    Copies the first `size` bytes of an open file descriptor to `out` without
+    decoding it. Stopping at the size seen during discovery keeps a file that
+    grows while it is copied, like the output file itself, from being read forever.
+
+    On Linux the bytes are handed over with os.sendfile, so the kernel copies
+    them straight into the output file. Elsewhere, or if sendfile is not
+    supported for the files involved, the file is read into `chunk`, a buffer
+    shared by all files of a dump, and written to `out` from there.
+
+    Returns:
+        The last byte copied, or b"" if nothing was copied.
+
+    Raises:
+        SourceReadError: If reading the source file fails.
+    """
+    offset = 0
+    if USE_SENDFILE:
+        # sendfile writes to the file descriptor directly, so everything
+        # buffered so far has to reach the file first
+        out.flush()
+        out_fd = out.fileno()
+        try:
+            while offset < size:
+                sent = os.sendfile(out_fd, src_fd, offset, min(COPY_CHUNK_SIZE, size - offset))
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError as e:
+            # any other error cannot be told apart from a failed write, so it
+            # is handled like one
+            if e.errno not in _SENDFILE_UNSUPPORTED:
+                raise
+        else:
+            # the copied bytes never pass through here, read the last one back
+            if not offset:
+                return b""
+            try:
+                return os.pread(src_fd, 1, offset - 1)
+            except OSError as e:
+                raise SourceReadError(e) from e
+        # sendfile does not move the file position, continue from where it stopped
+        try:
+            os.lseek(src_fd, offset, os.SEEK_SET)
+        except OSError as e:
+            raise SourceReadError(e) from e
+    last_byte = b""
+    with io.FileIO(src_fd, 'r', closefd=False) as src:
+        while offset < size:
+            try:
+                n = src.readinto(chunk[:min(len(chunk), size - offset)])
+            except OSError as e:
+                raise SourceReadError(e) from e
+            if not n:
+                break
+            out.write(chunk[:n])
+            last_byte = bytes(chunk[n - 1:n])
+            offset += n
+    return last_byte
+
+def create_file_content_dump(
+    root_dir: Path,
+    files: List[Tuple[Path, os.stat_result]],
+    out: io.BufferedWriter,
+) -> None:
     """
-    Reads the content of all specified files and combines them into a single string.
+    Copies the content of all specified files to `out` one by one, without
+    holding any of them in memory.
+
+    The stat results collected during discovery provide the file sizes, so no
+    file has to be stat'ed again. Files that cannot be read are reported in the
+    output; errors writing the output are left to the caller.
     """
-    output_parts = []
     def heading(title):
         """
-        Creates a formatted heading string.
+        Creates a formatted heading, encoded for the output file.
+        """
+        return HEADING_PREFIX + title.encode('utf-8') + HEADING_SUFFIX + BODY_START
+    def body_end(last_byte):
+        """
+        Creates the closing fence, on a line of its own after a body ending in `last_byte`.
+        """
+        return BODY_END if last_byte == b"\n" else b"\n" + BODY_END
+    def report_read_error(rel_path, e):
         """
-        h_str = f"### {title}"
-        return f"\n\n{h_str}\n"
-    for rel_path in rel_paths:
+        Writes a read error to the output and the console.
+        """
+        out.write(separator + f"Error reading file {rel_path}: {e}".encode('utf-8'))
+        print(f"Error reading file {rel_path}: {e}")
+    # copy buffer for files that cannot be sent with sendfile, allocated once
+    chunk = memoryview(bytearray(COPY_CHUNK_SIZE))
+    # parts are separated by a newline, the first one is written as is
+    separator = b""
+    for rel_path, stat_result in files:
+        size = stat_result.st_size
+        if size == 0: continue
         try:
-            absolute_path = root_dir / rel_path
-            content = absolute_path.read_text(encoding='utf-8', errors='ignore').strip()
-            if not content: continue
-            output_parts.append(heading(str(rel_path)))
-            output_parts.append(
-                ''.join(
-                    [f"\t{line}\n" for line in content.split('\n')]
-                )
-            )
-        except Exception as e:
-            output_parts.append(f"Error reading file {rel_path}: {e}")
-            print(f"Error reading file {rel_path}: {e}")
-            
-    return "\n".join(output_parts)
+            src_fd = os.open(root_dir / rel_path, READ_FLAGS)
+        except OSError as e:
+            report_read_error(rel_path, e)
+            separator = b"\n"
+            continue
+        try:
+            if size < SMALL_FILE_SIZE:
+                # small files are read with a single call and go into the
+                # output buffer, which saves a flush and a sendfile per file
+                try:
+                    data = os.read(src_fd, size)
+                except OSError as e:
+                    report_read_error(rel_path, e)
+                    separator = b"\n"
+                    continue
+                out.write(separator + heading(str(rel_path)))
+                out.write(data)
+                out.write(body_end(data[-1:]))
+            else:
+                out.write(separator + heading(str(rel_path)))
+                try:
+                    last_byte = _dump_file_raw(out, src_fd, size, chunk)
+                except SourceReadError as e:
+                    # close the partial body first, the error is not part of the file
+                    out.write(body_end(b""))
+                    separator = b"\n"
+                    report_read_error(rel_path, e)
+                else:
+                    out.write(body_end(last_byte))
+        finally:
+            os.close(src_fd)
+        separator = b"\n"
 
 
 # --- Main Execution ---
 
+def _is_same_file(path: Path, stat_result: os.stat_result, other_path: Path, other_stat: os.stat_result) -> bool:
+    """
+    Checks if two stat'ed files are the same file, also through symlinks or '..'.
+    """
+    if stat_result.st_ino:
+        return os.path.samestat(stat_result, other_stat)
+    # DirEntry.stat() leaves st_ino at zero on Windows; os.path.samefile stats
+    # both paths again, so only ask it for files that could be the same
+    if (stat_result.st_size, stat_result.st_mtime) != (other_stat.st_size, other_stat.st_mtime):
+        return False
+    try:
+        return os.path.samefile(path, other_path)
+    except OSError:
+        return False
+
 def main():
     """
     Main function to parse arguments and run the project dump.
@@ -252,6 +649,20 @@ def main():
         default=[],
         help="List of file names whose content should be excluded (but shown in the tree)."
     )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=16,
+        help="Number of threads scanning directories concurrently (default: 16).\n"
+             "Use 1 to scan serially."
+    )
+    parser.add_argument(
+        '--output-buffer-size',
+        type=int,
+        default=OUTPUT_BUFFER_SIZE,
+        help=f"Buffer size in bytes used for writing the output file (default: {OUTPUT_BUFFER_SIZE}).\n"
+             "Larger buffers mean fewer write calls, which helps on slow or network file systems."
+    )
     parser.add_argument(
         '--no-gitignore',
         action='store_true',
@@ -271,6 +682,10 @@ def main():
     )
     
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.output_buffer_size <= 0:
+        parser.error("--output-buffer-size must be a positive number of bytes.")
 
     if not args.source_dir.exists():
         print(f"Error: The source path '{args.source_dir}' does not exist.", file=sys.stderr)
@@ -290,10 +705,6 @@ def main():
         ignore_items.update(recipe.get('ignore', set()))
         exclude_content_items.update(recipe.get('exclude_content', set()))
 
-    # --- Convert ignore_items and exclude_items to re patterns ---
-    ignore_patterns = {_translate_to_re_pattern(pattern) for pattern in ignore_items}
-    exclude_content_patterns = {_translate_to_re_pattern(pattern) for pattern in exclude_content_items}
-
     # --- Parse gitignore ---
     gitignore_patterns = []
     if not args.no_gitignore:
@@ -302,40 +713,57 @@ def main():
         gitignore_patterns = parse_gitignore(gitignore_path)
         if gitignore_patterns:
             print(f"Found and parsed .gitignore, applying {len(gitignore_patterns)} patterns.")
-            exclude_content_patterns.update(gitignore_patterns)
+
+    # --- Convert ignore_items and exclude_items to matchers ---
+    # gitignore patterns come last and keep their order, which matters for negated patterns
+    ignore_matcher = _build_matcher(sorted(ignore_items))
+    exclude_content_matcher = _build_matcher(sorted(exclude_content_items) + gitignore_patterns)
 
     # --- Pass 1: Discover all relevant files ---
-    included_paths, excluded_content_paths = discover_files(
+    included_files, excluded_content_paths = discover_files(
         args.source_dir,
         file_endings,
-        ignore_patterns,
-        exclude_content_patterns,
+        ignore_matcher,
+        exclude_content_matcher,
+        args.workers,
     )
-    all_tree_paths = sorted(included_paths + excluded_content_paths)
+    # never read back the file that is being written, however its path is spelled
+    try:
+        output_stat = os.stat(args.output)
+    except OSError:
+        output_stat = None
+    if output_stat is not None:
+        included_files = [
+            f for f in included_files
+            if not _is_same_file(args.source_dir / f[0], f[1], args.output, output_stat)
+        ]
+    # the tree needs all paths in order, the dump only the included ones
+    all_tree_paths = sorted([path for path, _ in included_files] + excluded_content_paths)
+    included_files.sort(key=lambda f: f[0])
 
     if not all_tree_paths:
         print("Warning: No files matching the criteria were found. Output file will not be created.")
         return
 
     # --- Pass 2: Generate the output content ---
-    print(f"Found {len(included_paths)} files to include and {len(excluded_content_paths)} to exclude content from.")
+    print(f"Found {len(included_files)} files to include and {len(excluded_content_paths)} to exclude content from.")
     tree_str = create_tree(args.source_dir, all_tree_paths)
 
     if args.print_tree:
         print(tree_str)
         sys.exit(0)
 
-    content_dump_str = create_file_content_dump(args.source_dir, included_paths)
-
-    # --- Combine and write to file ---
-    output_content = (
-        f"# Project Dump for: {args.source_dir.resolve().name}\n\n"
-        f"## Folder Tree\n\n```\n{tree_str.strip()}\n```\n\n"
-        f"## File Contents\n{content_dump_str}"
-    )
-
+    # --- Stream header, tree and file contents to the output file ---
     try:
-        args.output.write_text(output_content, encoding='utf-8')
+        # the output is only written sequentially as bytes, so a plain
+        # BufferedWriter suffices and no text encoding layer is involved
+        with io.BufferedWriter(io.FileIO(args.output, 'w'), buffer_size=args.output_buffer_size) as out:
+            out.write((
+                f"# Project Dump for: {args.source_dir.resolve().name}\n\n"
+                f"## Folder Tree\n\n```\n{tree_str.strip()}\n```\n\n"
+                f"## File Contents\n"
+            ).encode('utf-8'))
+            create_file_content_dump(args.source_dir, included_files, out)
         print(f"✅ Project dump successfully created at: {args.output}")
     except IOError as e:
         print(f"Error writing to file '{args.output}': {e}", file=sys.stderr)